@@ -1,19 +1,63 @@
 import subprocess
 import sys
+import hashlib
+import base64
+import ensurepip
 import tempfile
 import shutil
 import os
+import re
 import webbrowser
 from pathlib import Path
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, List, Iterator
+import codecs
+import locale
+import queue
 import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 import tkinter as tk
 from tkinter import scrolledtext, PhotoImage, BooleanVar
 
 ICON_FILE = "ktp_icon.png"
 PROJECTS_DIR = Path("projects")
-
-streamlit_process: Optional[subprocess.Popen] = None
+VENV_CACHE_DIR = Path.home() / ".cache" / "ktptester" / "venvs"
+VENV_COMPLETE_MARKER = ".ktptester-complete"
+PIP_CACHE_DIR = Path.home() / ".cache" / "ktptester" / "pip"
+WHEELHOUSE_DIR = Path.home() / ".cache" / "ktptester" / "wheels"
+UV_EXECUTABLE = shutil.which("uv")
+MIN_PIP_VERSION = (23, 1)
+LOG_FLUSH_INTERVAL_MS = 33
+MAX_LOG_LINES = 5000
+RUN_POLL_INTERVAL_MS = 100
+READ_CHUNK_SIZE = 65536
+GIT_CONFIG = {
+    "http.version": "HTTP/2",
+    "fetch.parallel": "0",
+    "pack.threads": "0",
+}
+SKIPPED_DIRS = {".git", "venv", ".venv", "node_modules", "__pycache__", "site-packages", ".tox"}
+# A "streamlit" requirement line (after an optional UTF-8 BOM), optionally with extras, a version or a marker
+STREAMLIT_REQUIREMENT = re.compile(rb"(?im)^(?:\xef\xbb\xbf)?\s*streamlit(?:[\[=<>~!;@\s]|$)")
+# Requirement lines that depend on other files, e.g. "-r other.txt", "-e ." or "./libs/pkg.whl"
+LOCAL_REQUIREMENT = re.compile(
+    rb"(?im)^\s*(?:-[rce]|--(?:requirement|constraint|editable)\b|[.~/\\]|file:|[\w.-]+[/\\]|[^#\n]*@\s*file:)"
+)
+# Requirement lines installed from a URL or VCS, e.g. "pkg @ git+https://..." (index options excluded)
+URL_REQUIREMENT = re.compile(rb"(?im)^\s*(?!-)[^#\n]*(?:://|\b(?:git|hg|svn|bzr)\+)")
+
+# Child processes that are still running, terminated on a new run or on close
+running_processes: set[subprocess.Popen] = set()
+process_lock = threading.Lock()
+shutting_down = threading.Event()
+# Held while a cached environment is checked or built
+venv_cache_lock = threading.Lock()
+run_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ktp-run")
+# (text, tag) pairs written by worker threads, drained on the Tk thread
+log_queue: "queue.Queue[tuple[str, str]]" = queue.Queue()
+# find_file results per (repo_path, filename)
+found_files: dict[tuple[Path, str], Optional[Path]] = {}
 
 
 # -------------------------------------------------
@@ -27,38 +71,109 @@ def setup_log_tags(log_widget: scrolledtext.ScrolledText) -> None:
     log_widget.tag_config("student", foreground="black")
 
 
+def flush_log(log_widget: scrolledtext.ScrolledText) -> None:
+    chunks: List[str] = []
+    while True:
+        try:
+            text, tag = log_queue.get_nowait()
+        except queue.Empty:
+            break
+        chunks += [text, tag]
+
+    if chunks:
+        # Only follow the output if the user has not scrolled up
+        at_bottom = log_widget.yview()[1] >= 0.999
+        log_widget.insert(tk.END, *chunks)
+        trim_log(log_widget)
+        if at_bottom:
+            log_widget.see(tk.END)
+
+    log_widget.after(LOG_FLUSH_INTERVAL_MS, flush_log, log_widget)
+
+
+def trim_log(log_widget: scrolledtext.ScrolledText) -> None:
+    # Drop the oldest half at once, so trimming stays rare
+    line_count = int(log_widget.index("end-1c").split(".")[0])
+    if line_count <= MAX_LOG_LINES:
+        return
+
+    removed = line_count - MAX_LOG_LINES // 2
+    log_widget.delete("1.0", f"{removed + 1}.0")
+    log_widget.insert("1.0", f"✂️ Trimmed {removed} older log lines\n", "system")
+
+
 def log_message(log_widget: scrolledtext.ScrolledText, msg: str, tag: str = "system") -> None:
-    for line in msg.rstrip().split("\n"):
-        log_widget.insert(tk.END, line + "\n", tag)
-    log_widget.see(tk.END)
-    log_widget.update_idletasks()
+    log_queue.put((msg.rstrip() + "\n", tag))
     print(msg)
 
 
+def stream_output(process: subprocess.Popen, tag: str) -> Iterator[str]:
+    # Raw reads hand over whatever the child wrote, newline or not. Decoded with
+    # the locale encoding, as text mode did, which children write to pipes in
+    decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))(errors="replace")
+    fd = process.stdout.fileno()
+    while chunk := os.read(fd, READ_CHUNK_SIZE):
+        text = decoder.decode(chunk)
+        if text:
+            log_queue.put((text, tag))
+            yield text
+
+    text = decoder.decode(b"", final=True)
+    if text:
+        log_queue.put((text, tag))
+        yield text
+
+
+def start_process(
+    cmd: List[str],
+    cwd: Optional[Path] = None,
+    env: Optional[dict] = None,
+    started: Optional[threading.Event] = None
+) -> Optional[subprocess.Popen]:
+    with process_lock:
+        if shutting_down.is_set():
+            return None
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=cwd,
+            bufsize=0,
+            env=env
+        )
+        running_processes.add(process)
+        # Only set once registered, so terminate_processes can already reach it
+        if started:
+            started.set()
+        return process
+
+
+def terminate_processes() -> None:
+    with process_lock:
+        for process in running_processes:
+            if process.poll() is None:
+                process.terminate()
+
+
 def run_subprocess_live(
     cmd: List[str],
     log_widget: scrolledtext.ScrolledText,
     cwd: Optional[Path] = None,
     tag: str = "student",
-    env: Optional[dict] = None
+    env: Optional[dict] = None,
+    started: Optional[threading.Event] = None
 ) -> int:
-    process = subprocess.Popen(
-        cmd,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        cwd=cwd,
-        text=True,
-        bufsize=1,
-        env=env
-    )
-
-    if process.stdout:
-        for line in process.stdout:
-            log_widget.insert(tk.END, line, tag)
-            log_widget.see(tk.END)
-            log_widget.update_idletasks()
+    process = start_process(cmd, cwd=cwd, env=env, started=started)
+    if not process:
+        return -1
 
-    process.wait()
+    try:
+        for _ in stream_output(process, tag):
+            pass
+        process.wait()
+    finally:
+        with process_lock:
+            running_processes.discard(process)
     return process.returncode
 
 
@@ -77,13 +192,37 @@ def extract_repo_info(repo_url: str) -> tuple[str, str]:
     return parts[-2], parts[-1].replace(".git", "")
 
 
-def clone_repo(repo_url: str, target_path: Path, log_widget: scrolledtext.ScrolledText) -> bool:
+def git_env() -> dict:
+    # Passed through the environment so it applies to every git child process,
+    # appended after any entries the user already passes this way
+    env = dict(os.environ)
+    try:
+        start = int(env.get("GIT_CONFIG_COUNT", "0"))
+    except ValueError:
+        start = 0
+    env["GIT_CONFIG_COUNT"] = str(start + len(GIT_CONFIG))
+    for index, (key, value) in enumerate(GIT_CONFIG.items(), start):
+        env[f"GIT_CONFIG_KEY_{index}"] = key
+        env[f"GIT_CONFIG_VALUE_{index}"] = value
+    return env
+
+
+def clone_repo(
+    repo_url: str,
+    target_path: Path,
+    log_widget: scrolledtext.ScrolledText,
+    commit_hash: Optional[str] = None
+) -> bool:
     log_message(log_widget, f"🔄 Cloning {repo_url}")
-    return run_subprocess_live(
-        ["git", "clone", repo_url, str(target_path)],
-        log_widget,
-        tag="system"
-    ) == 0
+
+    if commit_hash is None:
+        # Only the tip of the default branch is needed
+        cmd = ["git", "clone", "--depth=1", "--single-branch", "--no-tags", repo_url, str(target_path)]
+    else:
+        # Full commit and tree history, blobs are fetched lazily on checkout
+        cmd = ["git", "clone", "--filter=blob:none", "--no-checkout", repo_url, str(target_path)]
+
+    return run_subprocess_live(cmd, log_widget, tag="system", env=git_env()) == 0
 
 
 def checkout_commit(target_path: Path, commit_hash: str, log_widget: scrolledtext.ScrolledText) -> bool:
@@ -91,7 +230,8 @@ def checkout_commit(target_path: Path, commit_hash: str, log_widget: scrolledtex
     return run_subprocess_live(
         ["git", "-C", str(target_path), "checkout", commit_hash],
         log_widget,
-        tag="system"
+        tag="system",
+        env=git_env()
     ) == 0
 
 
@@ -99,45 +239,202 @@ def checkout_commit(target_path: Path, commit_hash: str, log_widget: scrolledtex
 # Project inspection
 # -------------------------------------------------
 def find_file(repo_path: Path, filename: str) -> Optional[Path]:
-    for path in repo_path.rglob(filename):
-        return path
+    key = (repo_path, filename)
+    if key not in found_files:
+        found_files[key] = search_file(repo_path, filename)
+    return found_files[key]
+
+
+def search_file(repo_path: Path, filename: str) -> Optional[Path]:
+    # Breadth-first, so the shallowest match wins
+    pending = deque([repo_path])
+    while pending:
+        directory = pending.popleft()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIPPED_DIRS:
+                            pending.append(Path(entry.path))
+                    elif entry.name == filename:
+                        return Path(entry.path)
+        except OSError:
+            continue
     return None
 
 
-def is_streamlit_project(repo_path: Path) -> bool:
-    requirements = find_file(repo_path, "requirements.txt")
-    if not requirements:
-        return False
-    return "streamlit" in requirements.read_text(errors="ignore").lower()
+def forget_files(repo_path: Path) -> None:
+    for key in [key for key in found_files if key[0] == repo_path]:
+        del found_files[key]
 
 
-def create_venv(repo_path: Path) -> Path:
-    venv_dir = repo_path / "venv"
-    subprocess.run([sys.executable, "-m", "venv", str(venv_dir)], check=True)
+def is_streamlit_project(requirements: bytes) -> bool:
+    return bool(STREAMLIT_REQUIREMENT.search(requirements))
+
 
+# -------------------------------------------------
+# Virtual environment
+# -------------------------------------------------
+def venv_python(venv_dir: Path) -> Path:
+    # Not resolved: the venv interpreter is a symlink to the base interpreter
     python_path = (
         venv_dir / "Scripts" / "python.exe"
         if sys.platform.startswith("win")
         else venv_dir / "bin" / "python"
     )
-    return python_path.resolve()
+    return python_path.absolute()
+
+
+def pip_command(python_executable: Path) -> List[str]:
+    return [str(python_executable), "-m", "pip", "--disable-pip-version-check", "--no-input"]
+
+
+def bundled_pip_outdated() -> bool:
+    # New venvs get the pip wheel bundled with ensurepip
+    version = tuple(int(part) for part in ensurepip.version().split(".")[:2])
+    return version < MIN_PIP_VERSION
+
+
+def create_venv(venv_dir: Path) -> Path:
+    if UV_EXECUTABLE:
+        # --seed installs pip, which student programs may call like in a regular venv
+        subprocess.run(
+            [UV_EXECUTABLE, "venv", "--seed", "--relocatable", "--python", sys.executable, str(venv_dir)],
+            check=True
+        )
+    else:
+        subprocess.run([sys.executable, "-m", "venv", str(venv_dir)], check=True)
+    return venv_python(venv_dir)
 
 
 def install_requirements(
     python_executable: Path,
     repo_path: Path,
+    requirements_file: Optional[Path],
+    requirements: bytes,
     log_widget: scrolledtext.ScrolledText
-) -> None:
-    requirements_file = find_file(repo_path, "requirements.txt")
+) -> bool:
     if not requirements_file:
-        log_message(log_widget, "⚠️ No requirements.txt found", "warning")
-        return
+        return True
 
     log_message(log_widget, f"📦 Installing dependencies from {requirements_file.relative_to(repo_path)}")
-    run_subprocess_live(
-        [str(python_executable), "-m", "pip", "install", "-r", str(requirements_file)],
-        log_widget
-    )
+    if UV_EXECUTABLE:
+        # uv resolves and installs itself, without going through the venv's pip
+        cmd = [UV_EXECUTABLE, "pip", "install", "--python", str(python_executable), "-r", str(requirements_file)]
+        return run_subprocess_live(cmd, log_widget) == 0
+
+    env = dict(os.environ)
+    env["PIP_CACHE_DIR"] = str(PIP_CACHE_DIR)
+
+    # An outdated pip is upgraded in the same pip run as the requirements
+    upgrade_pip = ["--upgrade", "pip"] if bundled_pip_outdated() else []
+    cmd = pip_command(python_executable) + [
+        "install", "--prefer-binary", "--no-compile", *upgrade_pip, "-r", str(requirements_file)
+    ]
+
+    if (
+        wheelhouse_safe(requirements)
+        and fill_wheelhouse(python_executable, requirements_file, upgrade_pip[1:], log_widget, env)
+    ):
+        offline_cmd = cmd[:-2] + ["--no-index", "--find-links", str(WHEELHOUSE_DIR)] + cmd[-2:]
+        if run_subprocess_live(offline_cmd, log_widget, env=env) == 0:
+            return True
+        log_message(log_widget, "⚠️ Installing from the wheelhouse failed, retrying from the package index", "warning")
+
+    return run_subprocess_live(cmd, log_widget, env=env) == 0
+
+
+def wheelhouse_safe(requirements: bytes) -> bool:
+    # Project-specific builds must not end up in the shared wheelhouse, and
+    # their build dependencies are not in it either
+    return not (LOCAL_REQUIREMENT.search(requirements) or URL_REQUIREMENT.search(requirements))
+
+
+def fill_wheelhouse(
+    python_executable: Path,
+    requirements_file: Path,
+    packages: List[str],
+    log_widget: scrolledtext.ScrolledText,
+    env: dict
+) -> bool:
+    # Wheels rather than downloads, so sdists need no build tools at install time
+    WHEELHOUSE_DIR.mkdir(parents=True, exist_ok=True)
+    cmd = pip_command(python_executable) + [
+        "wheel", "--prefer-binary", "--wheel-dir", str(WHEELHOUSE_DIR), "--find-links", str(WHEELHOUSE_DIR),
+        *packages, "-r", str(requirements_file)
+    ]
+    return run_subprocess_live(cmd, log_widget, tag="system", env=env) == 0
+
+
+def build_venv(
+    venv_dir: Path,
+    repo_path: Path,
+    requirements_file: Optional[Path],
+    requirements: bytes,
+    log_widget: scrolledtext.ScrolledText
+) -> bool:
+    python_executable = create_venv(venv_dir)
+    return install_requirements(python_executable, repo_path, requirements_file, requirements, log_widget)
+
+
+def clear_venv_dir(venv_dir: Path) -> None:
+    if venv_dir.is_symlink():
+        venv_dir.unlink()
+    elif venv_dir.exists():
+        shutil.rmtree(venv_dir)
+
+
+def prepare_venv(
+    repo_path: Path,
+    requirements_file: Optional[Path],
+    requirements: bytes,
+    log_widget: scrolledtext.ScrolledText
+) -> Path:
+    # A venv/ committed by the student would shadow the environment used here
+    venv_dir = repo_path / "venv"
+    clear_venv_dir(venv_dir)
+
+    # Logged here, a cached environment skips install_requirements
+    if not requirements_file:
+        log_message(log_widget, "⚠️ No requirements.txt found", "warning")
+
+    # The file bytes do not identify the environment if they pull in other files
+    if LOCAL_REQUIREMENT.search(requirements):
+        log_message(log_widget, "⚠️ requirements.txt references local files, environment not cached", "warning")
+        build_venv(venv_dir, repo_path, requirements_file, requirements, log_widget)
+        return venv_python(venv_dir)
+
+    key = hashlib.sha256(requirements + sys.version.encode()).hexdigest()
+    cached_dir = VENV_CACHE_DIR / key
+    complete_marker = cached_dir / VENV_COMPLETE_MARKER
+
+    with venv_cache_lock:
+        if complete_marker.exists():
+            log_message(log_widget, "♻️ Reusing cached virtual environment")
+        else:
+            # Built in place, so console scripts and activate point at the final path.
+            # Anything already there is an interrupted build.
+            shutil.rmtree(cached_dir, ignore_errors=True)
+            VENV_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            try:
+                built = build_venv(cached_dir, repo_path, requirements_file, requirements, log_widget)
+            except BaseException:
+                shutil.rmtree(cached_dir, ignore_errors=True)
+                raise
+
+            if not built:
+                # Keep the broken environment with the project, out of the cache
+                log_message(log_widget, "⚠️ Installing requirements failed, environment not cached", "warning")
+                shutil.move(str(cached_dir), str(venv_dir))
+                return venv_python(venv_dir)
+
+            complete_marker.touch()
+
+    try:
+        venv_dir.symlink_to(cached_dir, target_is_directory=True)
+    except OSError:
+        venv_dir = cached_dir
+    return venv_python(venv_dir)
 
 
 # -------------------------------------------------
@@ -146,113 +443,173 @@ def install_requirements(
 def run_streamlit_app(
     python_executable: Path,
     app_file: Path,
-    log_widget: scrolledtext.ScrolledText
+    log_widget: scrolledtext.ScrolledText,
+    started: Optional[threading.Event] = None
 ) -> None:
-    global streamlit_process
-
     log_message(log_widget, f"🌐 Running Streamlit app ({app_file.relative_to(app_file.parents[1])})")
 
     env = dict(os.environ)
     env["STREAMLIT_BROWSER_GATHER_USAGE_STATS"] = "false"
     env["STREAMLIT_SERVER_HEADLESS"] = "false"
 
-    streamlit_process = subprocess.Popen(
+    streamlit_process = start_process(
         [str(python_executable), "-m", "streamlit", "run", str(app_file)],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1,
         cwd=app_file.parent,
-        env=env
+        env=env,
+        started=started
     )
+    if not streamlit_process:
+        return
 
-    if streamlit_process.stdout:
-        for line in streamlit_process.stdout:
-            log_widget.insert(tk.END, line, "student")
-            log_widget.see(tk.END)
-            log_widget.update_idletasks()
-
-            if "Local URL:" in line:
-                url = line.split("Local URL:")[-1].strip()
-                webbrowser.open(url)
+    try:
+        pending = ""
+        for text in stream_output(streamlit_process, "student"):
+            pending += text
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                if "Local URL:" in line:
+                    url = line.split("Local URL:")[-1].strip()
+                    webbrowser.open(url)
+        streamlit_process.wait()
+    finally:
+        with process_lock:
+            running_processes.discard(streamlit_process)
 
 
 def run_main(
     python_executable: Path,
     repo_path: Path,
-    log_widget: scrolledtext.ScrolledText
+    requirements: bytes,
+    log_widget: scrolledtext.ScrolledText,
+    program_started: threading.Event
 ) -> None:
-    if is_streamlit_project(repo_path):
-        app_file = (
-            find_file(repo_path, "main.py")
-            or find_file(repo_path, "app.py")
-            or find_file(repo_path, "streamlit_app.py")
-        )
-        if not app_file:
-            log_message(log_widget, "⚠️ Streamlit detected but no app file found", "warning")
+    # The program may run until it is stopped, a new run can start once it is
+    # registered. The finally covers runs that never start a program.
+    try:
+        if is_streamlit_project(requirements):
+            app_file = (
+                find_file(repo_path, "main.py")
+                or find_file(repo_path, "app.py")
+                or find_file(repo_path, "streamlit_app.py")
+            )
+            if not app_file:
+                log_message(log_widget, "⚠️ Streamlit detected but no app file found", "warning")
+                return
+
+            run_streamlit_app(python_executable, app_file, log_widget, program_started)
             return
 
-        run_streamlit_app(python_executable, app_file, log_widget)
-        return
-
-    main_file = find_file(repo_path, "main.py")
-    if not main_file:
-        log_message(log_widget, "⚠️ No main.py found", "warning")
-        return
+        main_file = find_file(repo_path, "main.py")
+        if not main_file:
+            log_message(log_widget, "⚠️ No main.py found", "warning")
+            return
 
-    log_message(log_widget, f"▶️ Running {main_file.relative_to(repo_path)}")
-    run_subprocess_live(
-        [str(python_executable), str(main_file)],
-        log_widget,
-        cwd=main_file.parent
-    )
+        log_message(log_widget, f"▶️ Running {main_file.relative_to(repo_path)}")
+        run_subprocess_live(
+            [str(python_executable), str(main_file)],
+            log_widget,
+            cwd=main_file.parent,
+            started=program_started
+        )
+    finally:
+        program_started.set()
 
 
 # -------------------------------------------------
 # Execution
 # -------------------------------------------------
-def run_repo(input_url: str, log_widget: scrolledtext.ScrolledText, store_locally: bool) -> None:
+def discard_directory(path: Path) -> None:
+    # Renaming is instant, the slow delete overlaps with the new clone
+    trash = path.with_name(f"{path.name}.trash.{os.urandom(4).hex()}")
+    try:
+        path.rename(trash)
+    except OSError:
+        shutil.rmtree(path)
+        return
+
+    # Also retry leftovers of deletes that were cut short when the app exited
+    threading.Thread(
+        target=remove_directories,
+        args=(list(path.parent.glob(f"{path.name}.trash.*")),),
+        daemon=True
+    ).start()
+
+
+def remove_directories(paths: List[Path]) -> None:
+    for path in paths:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def run_repo(
+    input_url: str,
+    log_widget: scrolledtext.ScrolledText,
+    store_locally: bool,
+    program_started: threading.Event
+) -> None:
     repo_url, commit_hash = parse_repo_input(input_url)
     username, repo_name = extract_repo_info(repo_url)
 
     if store_locally:
         target_path = PROJECTS_DIR / username / repo_name
         if target_path.exists():
-            shutil.rmtree(target_path)
+            discard_directory(target_path)
         target_path.parent.mkdir(parents=True, exist_ok=True)
     else:
         tmpdir = tempfile.TemporaryDirectory()
         target_path = Path(tmpdir.name) / repo_name
 
     target_path = target_path.resolve()
+    forget_files(target_path)
 
-    if not clone_repo(repo_url, target_path, log_widget):
+    if not clone_repo(repo_url, target_path, log_widget, commit_hash):
         return
 
     if commit_hash and not checkout_commit(target_path, commit_hash, log_widget):
         return
 
-    python_executable = create_venv(target_path)
+    requirements_file = find_file(target_path, "requirements.txt")
+    requirements = requirements_file.read_bytes() if requirements_file else b""
 
-    run_subprocess_live(
-        [str(python_executable), "-m", "pip", "install", "--upgrade", "pip"],
-        log_widget,
-        tag="system"
-    )
+    python_executable = prepare_venv(target_path, requirements_file, requirements, log_widget)
+    run_main(python_executable, target_path, requirements, log_widget, program_started)
 
-    install_requirements(python_executable, target_path, log_widget)
-    run_main(python_executable, target_path, log_widget)
 
+def start_run_thread(
+    url: str,
+    log_widget: scrolledtext.ScrolledText,
+    store_var: BooleanVar,
+    run_button: tk.Button
+) -> None:
+    if not url.strip() or run_button["state"] == tk.DISABLED:
+        return
+
+    # Stop the program of the previous run, e.g. a Streamlit server
+    terminate_processes()
 
-def start_run_thread(url: str, log_widget: scrolledtext.ScrolledText, store_var: BooleanVar) -> None:
-    if not url.strip():
+    run_button.config(state=tk.DISABLED)
+    program_started = threading.Event()
+    future = run_pool.submit(run_repo, url.strip(), log_widget, store_var.get(), program_started)
+    watch_run(future, program_started, log_widget, run_button)
+
+
+def watch_run(
+    future: Future,
+    program_started: threading.Event,
+    log_widget: scrolledtext.ScrolledText,
+    run_button: tk.Button,
+    released: bool = False
+) -> None:
+    # Polled from the Tk thread, done callbacks would run on the worker thread
+    if not released and (program_started.is_set() or future.done()):
+        run_button.config(state=tk.NORMAL)
+        released = True
+
+    if not future.done():
+        run_button.after(RUN_POLL_INTERVAL_MS, watch_run, future, program_started, log_widget, run_button, released)
         return
 
-    threading.Thread(
-        target=run_repo,
-        args=(url.strip(), log_widget, store_var.get()),
-        daemon=True
-    ).start()
+    if future.exception():
+        log_message(log_widget, f"❌ Run failed: {future.exception()}", "error")
 
 
 # -------------------------------------------------
@@ -264,16 +621,35 @@ def center_window(root: tk.Tk, width: int, height: int) -> None:
     root.geometry(f"{width}x{height}+{x}+{y}")
 
 
-def main() -> None:
-    root = tk.Tk()
-    root.title("KTP Project Tester")
-    center_window(root, 650, 700)
+@lru_cache(maxsize=1)
+def read_icon() -> Optional[bytes]:
+    try:
+        return base64.b64encode(Path(ICON_FILE).read_bytes())
+    except OSError:
+        return None
+
 
+def load_icon(root: tk.Tk) -> Optional[PhotoImage]:
+    # A PhotoImage belongs to one Tk root, only the file contents are shared
+    data = read_icon()
+    if not data:
+        return None
     try:
-        icon = PhotoImage(file=ICON_FILE)
-        root.iconphoto(True, icon)
+        return PhotoImage(master=root, data=data)
     except Exception:
-        pass
+        return None
+
+
+def finish_window(root: tk.Tk) -> None:
+    center_window(root, 650, 700)
+    icon = load_icon(root)
+    if icon:
+        root.iconphoto(True, icon)
+
+
+def main() -> None:
+    root = tk.Tk()
+    root.title("KTP Project Tester")
 
     tk.Label(root, text="Enter student GitHub repo URL:", font=("Arial", 17)).pack(pady=(10, 0))
 
@@ -293,7 +669,7 @@ def main() -> None:
         root,
         text="Run",
         font=("Arial", 12),
-        command=lambda: start_run_thread(entry.get(), log_widget, store_var)
+        command=lambda: start_run_thread(entry.get(), log_widget, store_var, run_button)
     )
     run_button.pack(pady=6)
 
@@ -302,17 +678,19 @@ def main() -> None:
     log_widget = scrolledtext.ScrolledText(root, width=70, height=30)
     log_widget.pack(pady=5)
     setup_log_tags(log_widget)
+    flush_log(log_widget)
 
     tk.Label(root, text="Made by Cor Steging", font=("Arial", 8), fg="gray").pack(side="bottom", pady=5)
 
     def on_close() -> None:
-        global streamlit_process
-        if streamlit_process and streamlit_process.poll() is None:
-            streamlit_process.terminate()
+        shutting_down.set()
+        terminate_processes()
         root.destroy()
 
     root.protocol("WM_DELETE_WINDOW", on_close)
-    root.bind("<Return>", lambda _: start_run_thread(entry.get(), log_widget, store_var))
+    # Icon decoding and centering wait until the widgets are on screen
+    root.after_idle(finish_window, root)
+    root.bind("<Return>", lambda _: start_run_thread(entry.get(), log_widget, store_var, run_button))
 
     root.mainloop()
 